@@ -16,29 +16,34 @@ Usage
 -----
 python telemetry_report_plus.py
 python telemetry_report_plus.py public/reports public/reports_local /some/other/folder
+python telemetry_report_plus.py --format pdf   # render the PDF directly (no DOCX / LibreOffice)
 
 Artifacts
 ---------
 public/manual_reports/report_YYYYMMDD_HHMMSS/
   - telemetry_report.docx
-  - telemetry_report.pdf        (if LibreOffice detected)
+  - telemetry_report.pdf        (if LibreOffice detected, or with --format pdf)
   - specs.csv
   - summary.csv                 (one row per machine+model)
   - digits.csv                  (per-digit rows)
-  - figures/*.png
+  - figures/*.png               (DOCX format only)
 """
 
 import os
 import re
 import sys
+import argparse
 import json
 import math
+import functools
 import shutil
 import statistics as stats
+from collections import Counter
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple, Any, Optional
+from typing import Dict, Iterator, List, Tuple, Any, Optional
 
 import numpy as np
 import pandas as pd
@@ -48,7 +53,25 @@ from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 import matplotlib
+matplotlib.use('Agg')  # headless: skip GUI backend probing
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+try:
+    import orjson  # optional: much faster JSON decoding for large telemetry files
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # optional: streaming parser for very large telemetry files
+except ImportError:
+    ijson = None
+
+try:
+    import pyarrow as pa  # optional: C-side CSV encoder for the sidecar CSVs
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
 
 # --------- Config & Paths ---------
 PUBLIC_DIR = Path('public')
@@ -59,6 +82,13 @@ DEFAULT_INPUT_DIRS = [
 MANUAL_REPORTS_DIR = PUBLIC_DIR / 'manual_reports'
 REPORT_FOLDER = MANUAL_REPORTS_DIR / f'report_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
 FIG_DIR = REPORT_FOLDER / 'figures'
+REPORT_TITLE = 'Distributed ML Infrastructure Testing Framework — Telemetry Report'
+STREAM_THRESHOLD_BYTES = 50 * 1024**2  # larger files are streamed with ijson (when installed)
+FIG_DPI = 120  # figures are embedded at 6in wide, so more pixels are just thrown away
+# Column dtypes applied after merging (string keys → category); digit/idx/pred are made nullable ints per file in parse_one
+# Column dtypes for the perf frames (string keys → category, ids/labels → nullable ints)
+_KEY_DTYPES = {'machine_id': 'category', 'machine_name': 'category', 'model_file': 'category', 'model_size': 'category'}
+_SUMMARY_DTYPES = {**_KEY_DTYPES, 'webgpu_init_ok': 'bool'}
 
 # --------- Helpers ---------
 def _coerce_float(x, default=np.nan):
@@ -67,35 +97,55 @@ def _coerce_float(x, default=np.nan):
     except Exception:
         return default
 
+_SIZE_RE = re.compile(r'_(S|M|L|XL)\d*\.json$', re.IGNORECASE)
+_SIZE_RE_FALLBACK = re.compile(r'(S|M|L|XL)', re.IGNORECASE)
+
+@functools.lru_cache(maxsize=4096)
 def _model_size_bucket(name: str) -> str:
     # Heuristic: mnist_S1.json → S, mnist_XL2.json → XL
-    m = re.search(r'_(S|M|L|XL)\d*\.json$', name, re.IGNORECASE)
+    m = _SIZE_RE.search(name)
     if not m:
-        m = re.search(r'(S|M|L|XL)', name, re.IGNORECASE)
+        m = _SIZE_RE_FALLBACK.search(name)
     return (m.group(1).upper() if m else 'UNK')
 
-def _safe_get(d: dict, *keys, default=None):
-    cur = d
-    for k in keys:
-        if cur is None or (not isinstance(cur, dict)) or k not in cur:
-            return default
-        cur = cur[k]
-    return cur
-
-def _pct(a: Iterable[float], q: float) -> float:
-    arr = [x for x in a if isinstance(x, (int, float)) and not math.isnan(x)]
-    if not arr:
-        return np.nan
-    arr = sorted(arr)
-    idx = int(round((q/100.0)*(len(arr)-1)))
-    return float(arr[idx])
-
-def _is_mode_collapse(per_digit_preds: List[int]) -> bool:
-    # If 7+ out of 10 digits map to the same predicted label, flag as suspicious
-    if not per_digit_preds:
-        return False
-    most = max((per_digit_preds.count(v) for v in set(per_digit_preds)))
-    return most >= 7
+def _float_cols(recs: List[dict], keys: Tuple[str, ...]) -> np.ndarray:
+    # Single pass over recs → float64 block of shape (len(keys), len(recs)); missing/non-numeric → NaN
+    if not recs:
+        return np.empty((len(keys), 0))
+    return np.array([[_coerce_float(r.get(k)) if isinstance(r, dict) else np.nan for k in keys] for r in recs],
+                    dtype=np.float64).T
+
+def _fit_cols(block: np.ndarray, n: int) -> np.ndarray:
+    # Truncate or NaN-pad a column block to exactly n entries
+    out = np.full((block.shape[0], n), np.nan)
+    m = min(n, block.shape[1])
+    out[:, :m] = block[:, :m]
+    return out
+
+def _as_nullable_int(col: np.ndarray, dtype: str) -> pd.api.extensions.ExtensionArray:
+    # Float column → nullable int; non-integral or out-of-range values become NA instead of raising
+    info = np.iinfo(dtype.lower())
+    ok = np.isfinite(col) & (col == np.floor(col)) & (col >= info.min) & (col <= info.max)
+    return pd.array(np.where(ok, col, np.nan), dtype=dtype)
+
+def _fast_pct(arr: np.ndarray) -> Tuple[float, float, float]:
+    # Nearest-rank P50/P90/P99 ignoring NaN; np.partition is O(n), only worth it past a few dozen values
+    a = arr[~np.isnan(arr)]
+    if a.size == 0:
+        return (np.nan,) * 3
+    if a.size < 32:
+        return tuple(np.percentile(a, [50, 90, 99], method='nearest'))
+    idx = np.rint(np.array([0.50, 0.90, 0.99]) * (a.size - 1)).astype(np.intp)
+    return tuple(np.partition(a, idx)[idx])
+
+def _max_pred_count(preds: pd.Series) -> int:
+    # Size of the most common predicted label (mode-collapse detector)
+    arr = preds.dropna().astype(np.int64).to_numpy()
+    if arr.size == 0:
+        return 0
+    if arr.min() >= 0:
+        return int(np.bincount(arr).max())
+    return Counter(arr.tolist()).most_common(1)[0][1]
 
 # --------- Load Telemetry ---------
 def find_input_dirs(argv: List[str]) -> List[Path]:
@@ -104,146 +154,208 @@ def find_input_dirs(argv: List[str]) -> List[Path]:
     return DEFAULT_INPUT_DIRS
 
 def discover_json_files(input_dirs: List[Path]) -> List[Path]:
-    files: List[Path] = []
-    for d in input_dirs:
-        if d.exists():
-            files.extend(sorted(d.glob('telemetry_*.json')))
-    # Unique by stem
+    # Unique by stem; earlier dirs win, names sorted within each dir
     seen = set()
-    uniq = []
-    for f in files:
-        if f.stem not in seen:
-            uniq.append(f)
-            seen.add(f.stem)
-    return uniq
-
-def load_all() -> Tuple[pd.DataFrame, pd.DataFrame, List[Path]]:
-    json_files = discover_json_files(find_input_dirs(sys.argv[1:]))
-    if not json_files:
-        raise SystemExit("No telemetry_*.json files found in default or provided folders.")
-
-    specs_rows: List[Dict[str, Any]] = []
-    perf_rows: List[Dict[str, Any]] = []
-
-    for fp in json_files:
+    uniq: List[Path] = []
+    for d in input_dirs:
+        if not d.is_dir():
+            continue
         try:
-            with open(fp, 'r') as f:
-                t = json.load(f)
-        except Exception as e:
-            print(f"⚠️  Skipping unreadable {fp}: {e}")
+            with os.scandir(d) as it:
+                names = sorted(e.name for e in it if e.name.startswith('telemetry_') and e.name.endswith('.json'))
+        except OSError:  # unreadable folder: skip quietly, as Path.glob did
             continue
+        for name in names:
+            stem = name[:-5]
+            if stem not in seen:
+                seen.add(stem)
+                uniq.append(d / name)
+    return uniq
 
-        sysinfo = t.get('system_info', {})
-        machine_id = t.get('machine_id', fp.stem)
-        started_at = t.get('started_at', '')
-        machine_name = sysinfo.get('device_model') or sysinfo.get('cpu_model', 'unknown').split(' CPU')[0]
-
-        specs_rows.append({
+def _stream_telemetry(fp: Path) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    # Pass 1 keeps only the small top-level fields (and validates the whole file);
+    # pass 2 yields per_model entries one at a time
+    head: Dict[str, Any] = {}
+    builder = None
+    with open(fp, 'rb') as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if prefix == 'system_info' or prefix.startswith('system_info.'):
+                if builder is None:
+                    builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                if prefix == 'system_info' and event == 'end_map':
+                    head['system_info'] = builder.value
+            elif prefix in ('machine_id', 'started_at') and event == 'string':
+                head[prefix] = value
+
+    def models() -> Iterator[Dict[str, Any]]:
+        with open(fp, 'rb') as f:
+            yield from ijson.items(f, 'per_model.item', use_float=True)
+
+    return head, models()
+
+def parse_one(fp: Path) -> Tuple[Optional[Dict[str, Any]], Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    # Top-level so it can be pickled into ProcessPoolExecutor workers
+    summary_rows: List[Dict[str, Any]] = []
+    digit_frames: List[pd.DataFrame] = []
+    try:
+        if ijson is not None and os.path.getsize(fp) > STREAM_THRESHOLD_BYTES:
+            t, models = _stream_telemetry(fp)
+        else:
+            with open(fp, 'rb') as f:
+                data = f.read()
+            t = orjson.loads(data) if orjson else json.loads(data)
+            models = t.get('per_model', [])
+    except Exception as e:
+        print(f"⚠️  Skipping unreadable {fp}: {e}")
+        return None, None, None
+
+    sysinfo = t.get('system_info') or {}
+    machine_id = t.get('machine_id', fp.stem)
+    started_at = t.get('started_at', '')
+    machine_name = sysinfo.get('device_model') or sysinfo.get('cpu_model', 'unknown').split(' CPU')[0]
+
+    spec_row = {
+        'machine_id': machine_id,
+        'machine_name': machine_name,
+        'architecture': sysinfo.get('architecture', ''),
+        'os': sysinfo.get('os', ''),
+        'os_version': sysinfo.get('os_version', ''),
+        'cpu_model': sysinfo.get('cpu_model', ''),
+        'gpu_model': sysinfo.get('gpu_model', ''),
+        'ram_gb': float(sysinfo.get('ram_bytes', 0) or 0) / (1024**3),
+        'started_at': started_at,
+        'models_tested': 0,  # counted below; a streamed per_model has no len()
+    }
+
+    for model in models:
+        spec_row['models_tested'] += 1
+        model_file = model.get('model_file', '')
+        size_bucket = _model_size_bucket(model_file)
+        webgpu_ok = bool(model.get('webgpu_init_ok', False))
+        webgpu_init_time_ms = _coerce_float(model.get('webgpu_init_time_ms'))
+
+        cpu_recs = model.get('cpu', []) or []
+        gpu_recs = model.get('gpu', []) or []
+        drift_recs = model.get('drift', []) or []
+
+        # Extract every numeric field once; summary stats and digit rows share these arrays
+        cpu_digit, cpu_idx, cpu_pred, cpu_top1, cpu_lat = _float_cols(cpu_recs, ('digit', 'idx', 'pred', 'top1_score', 'elapsed_ms'))
+        gpu_block = _float_cols(gpu_recs if webgpu_ok else [], ('pred', 'top1_score', 'elapsed_ms'))
+        drift_block = _float_cols(drift_recs, ('mae', 'max_abs'))
+        gpu_lat = gpu_block[2]
+
+        # Per-model summary (10 digits)
+        adhd10 = model.get('adhd10', {}) or {}
+
+        # Mean + P50/P90/P99 per device (NaN when there are no valid timings)
+        cpu_p = _fast_pct(cpu_lat)
+        gpu_p = _fast_pct(gpu_lat)
+        cpu_ms = np.nan if np.isnan(cpu_p[0]) else np.nanmean(cpu_lat)
+        gpu_ms = np.nan if np.isnan(gpu_p[0]) else np.nanmean(gpu_lat)
+
+        # Speedup & throughput
+        speedup = (cpu_ms / gpu_ms) if (isinstance(cpu_ms, float) and isinstance(gpu_ms, float) and gpu_ms and not math.isnan(cpu_ms) and not math.isnan(gpu_ms)) else np.nan
+        cpu_throughput = (1000.0 / cpu_ms) if cpu_ms and not math.isnan(cpu_ms) else np.nan
+        gpu_throughput = (1000.0 / gpu_ms) if gpu_ms and not math.isnan(gpu_ms) else np.nan
+
+        summary_rows.append({
             'machine_id': machine_id,
             'machine_name': machine_name,
-            'architecture': sysinfo.get('architecture', ''),
-            'os': sysinfo.get('os', ''),
-            'os_version': sysinfo.get('os_version', ''),
-            'cpu_model': sysinfo.get('cpu_model', ''),
-            'gpu_model': sysinfo.get('gpu_model', ''),
-            'ram_gb': float(_safe_get(sysinfo, 'ram_bytes', default=0)) / (1024**3),
-            'started_at': started_at,
-            'models_tested': len(t.get('per_model', [])),
+            'model_file': model_file,
+            'model_size': size_bucket,
+            'webgpu_init_ok': webgpu_ok,
+            'webgpu_init_time_ms': webgpu_init_time_ms,
+            'cpu_top1_accuracy': _coerce_float(adhd10.get('top1_accuracy_cpu')),
+            'gpu_top1_accuracy': _coerce_float(adhd10.get('top1_accuracy_gpu')),
+            'cpu_vs_gpu_agree_count': _coerce_float(adhd10.get('cpu_vs_gpu_agree_count')),
+            'avg_drift_mae': _coerce_float(adhd10.get('avg_drift_mae')),
+            'max_drift_max_abs': _coerce_float(adhd10.get('max_drift_max_abs')),
+            'cpu_elapsed_avg_ms': cpu_ms,
+            'gpu_elapsed_avg_ms': gpu_ms,
+            'speedup_gpu_over_cpu': speedup,
+            'cpu_samples_per_sec': cpu_throughput,
+            'gpu_samples_per_sec': gpu_throughput,
+            'lat_p50_cpu_ms': cpu_p[0],
+            'lat_p90_cpu_ms': cpu_p[1],
+            'lat_p99_cpu_ms': cpu_p[2],
+            'lat_p50_gpu_ms': gpu_p[0],
+            'lat_p90_gpu_ms': gpu_p[1],
+            'lat_p99_gpu_ms': gpu_p[2],
+            'is_digit': False,
         })
 
-        for model in t.get('per_model', []):
-            model_file = model.get('model_file', '')
-            size_bucket = _model_size_bucket(model_file)
-            webgpu_ok = bool(model.get('webgpu_init_ok', False))
-            webgpu_init_time_ms = _coerce_float(model.get('webgpu_init_time_ms'))
-
-            cpu_recs = model.get('cpu', []) or []
-            gpu_recs = model.get('gpu', []) or []
-            drift_recs = model.get('drift', []) or []
-
-            # Per-model summary (10 digits)
-            cpu_lat = [_coerce_float(r.get('elapsed_ms')) for r in cpu_recs]
-            gpu_lat = [_coerce_float(r.get('elapsed_ms')) for r in gpu_recs] if webgpu_ok else []
-            adhd10 = model.get('adhd10', {}) or {}
-
-            # Speedup & throughput
-            cpu_ms = np.nanmean(cpu_lat) if cpu_lat else np.nan
-            gpu_ms = np.nanmean(gpu_lat) if gpu_lat else np.nan
-            speedup = (cpu_ms / gpu_ms) if (isinstance(cpu_ms, float) and isinstance(gpu_ms, float) and gpu_ms and not math.isnan(cpu_ms) and not math.isnan(gpu_ms)) else np.nan
-            cpu_throughput = (1000.0 / cpu_ms) if cpu_ms and not math.isnan(cpu_ms) else np.nan
-            gpu_throughput = (1000.0 / gpu_ms) if gpu_ms and not math.isnan(gpu_ms) else np.nan
-
-            perf_rows.append({
-                'machine_id': machine_id,
-                'machine_name': machine_name,
-                'model_file': model_file,
-                'model_size': size_bucket,
-                'webgpu_init_ok': webgpu_ok,
-                'webgpu_init_time_ms': webgpu_init_time_ms,
-                'cpu_top1_accuracy': _coerce_float(adhd10.get('top1_accuracy_cpu')),
-                'gpu_top1_accuracy': _coerce_float(adhd10.get('top1_accuracy_gpu')),
-                'cpu_vs_gpu_agree_count': _coerce_float(adhd10.get('cpu_vs_gpu_agree_count')),
-                'avg_drift_mae': _coerce_float(adhd10.get('avg_drift_mae')),
-                'max_drift_max_abs': _coerce_float(adhd10.get('max_drift_max_abs')),
-                'cpu_elapsed_avg_ms': cpu_ms,
-                'gpu_elapsed_avg_ms': gpu_ms,
-                'speedup_gpu_over_cpu': speedup,
-                'cpu_samples_per_sec': cpu_throughput,
-                'gpu_samples_per_sec': gpu_throughput,
-                'lat_p50_cpu_ms': _pct(cpu_lat, 50),
-                'lat_p90_cpu_ms': _pct(cpu_lat, 90),
-                'lat_p99_cpu_ms': _pct(cpu_lat, 99),
-                'lat_p50_gpu_ms': _pct(gpu_lat, 50) if webgpu_ok else np.nan,
-                'lat_p90_gpu_ms': _pct(gpu_lat, 90) if webgpu_ok else np.nan,
-                'lat_p99_gpu_ms': _pct(gpu_lat, 99) if webgpu_ok else np.nan,
-                'is_digit': False,
-            })
-
-            # Per-digit rows
-            for i, cpu_d in enumerate(cpu_recs):
-                gpu_d = (gpu_recs[i] if i < len(gpu_recs) else {}) if webgpu_ok else {}
-                drift_d = (drift_recs[i] if i < len(drift_recs) else {}) or {}
-                perf_rows.append({
-                    'machine_id': machine_id,
-                    'machine_name': machine_name,
-                    'model_file': model_file,
-                    'model_size': size_bucket,
-                    'is_digit': True,
-                    'digit': cpu_d.get('digit'),
-                    'idx': cpu_d.get('idx'),
-                    'cpu_pred': cpu_d.get('pred'),
-                    'gpu_pred': gpu_d.get('pred', np.nan),
-                    'cpu_top1_score': _coerce_float(cpu_d.get('top1_score')),
-                    'gpu_top1_score': _coerce_float(gpu_d.get('top1_score', np.nan)),
-                    'cpu_elapsed_ms': _coerce_float(cpu_d.get('elapsed_ms')),
-                    'gpu_elapsed_ms': _coerce_float(gpu_d.get('elapsed_ms', np.nan)),
-                    'drift_mae': _coerce_float(drift_d.get('mae')),
-                    'drift_max_abs': _coerce_float(drift_d.get('max_abs')),
-                })
+        # Per-digit rows, built column-wise from typed arrays
+        n = len(cpu_recs)
+        if n == 0:
+            continue
+        gpu_pred, gpu_top1, gpu_elapsed = _fit_cols(gpu_block, n)
+        drift_mae, drift_max_abs = _fit_cols(drift_block, n)
+        digit_frames.append(pd.DataFrame({
+            'machine_id': np.repeat(machine_id, n),
+            'machine_name': np.repeat(machine_name, n),
+            'model_file': np.repeat(model_file, n),
+            'model_size': np.repeat(size_bucket, n),
+            'is_digit': np.ones(n, dtype=bool),
+            'digit': _as_nullable_int(cpu_digit, 'Int8'),
+            'idx': _as_nullable_int(cpu_idx, 'Int32'),
+            'cpu_pred': _as_nullable_int(cpu_pred, 'Int16'),
+            'gpu_pred': _as_nullable_int(gpu_pred, 'Int16'),
+            'cpu_top1_score': cpu_top1,
+            'gpu_top1_score': gpu_top1,
+            'cpu_elapsed_ms': cpu_lat,
+            'gpu_elapsed_ms': gpu_elapsed,
+            'drift_mae': drift_mae,
+            'drift_max_abs': drift_max_abs,
+        }))
+    df_digits = pd.concat(digit_frames, ignore_index=True) if digit_frames else pd.DataFrame()
+    return spec_row, pd.DataFrame(summary_rows), df_digits
+
+def load_all(argv: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, List[Path], pd.DataFrame]:
+    json_files = discover_json_files(find_input_dirs(argv))
+    if not json_files:
+        raise SystemExit("No telemetry_*.json files found in default or provided folders.")
 
+    specs_rows: List[Dict[str, Any]] = []
+    summary_frames: List[pd.DataFrame] = []
+    digit_frames: List[pd.DataFrame] = []
+
+    with ProcessPoolExecutor() as ex:
+        for spec_row, df_sum, df_dig in ex.map(parse_one, json_files, chunksize=4):
+            if spec_row is None:
+                continue
+            specs_rows.append(spec_row)
+            summary_frames.append(df_sum)
+            digit_frames.append(df_dig)
+
+    # Summary and per-digit rows have disjoint schemas, so keep them as separate frames throughout
     df_specs = pd.DataFrame(specs_rows)
-    df_perf = pd.DataFrame(perf_rows)
+    df_summary = pd.concat(summary_frames, ignore_index=True) if summary_frames else pd.DataFrame()
+    df_digits = pd.concat(digit_frames, ignore_index=True) if digit_frames else pd.DataFrame()
+    if not df_summary.empty:
+        df_summary = df_summary.astype(_SUMMARY_DTYPES)
+    if not df_digits.empty:
+        df_digits = df_digits.astype(_KEY_DTYPES)
 
     # Anomaly flags: per machine+model, check if many digits predict same class
-    if not df_perf.empty:
-        collapses = []
-        for (mach, mod), sub in df_perf[df_perf['is_digit'] == True].groupby(['machine_name', 'model_file']):
-            preds = [int(p) for p in sub['cpu_pred'].dropna().tolist() if isinstance(p, (int, np.integer))]
-            if _is_mode_collapse(preds):
-                collapses.append({'machine_name': mach, 'model_file': mod, 'anomaly': 'cpu_mode_collapse'})
-            if 'gpu_pred' in sub.columns:
-                gp = [int(p) for p in sub['gpu_pred'].dropna().tolist() if isinstance(p, (int, np.integer))]
-                if _is_mode_collapse(gp):
-                    collapses.append({'machine_name': mach, 'model_file': mod, 'anomaly': 'gpu_mode_collapse'})
-        df_anom = pd.DataFrame(collapses)
+    if not df_digits.empty:
+        # One aggregation pass over both prediction columns; 7+ of 10 digits on one label is suspicious
+        counts = df_digits.groupby(['machine_name', 'model_file'], observed=True)[['cpu_pred', 'gpu_pred']].agg(_max_pred_count)
+        keys = ['machine_name', 'model_file']
+        long = counts.reset_index().melt(id_vars=keys, var_name='anomaly', value_name='n')
+        df_anom = (long[long['n'] >= 7]
+                   .sort_values(keys, kind='stable')
+                   .drop(columns='n')
+                   .reset_index(drop=True))
+        df_anom['anomaly'] = df_anom['anomaly'].str.replace('_pred', '_mode_collapse')
     else:
         df_anom = pd.DataFrame(columns=['machine_name', 'model_file', 'anomaly'])
 
-    return df_specs, df_perf, json_files, df_anom
+    return df_specs, df_summary, df_digits, json_files, df_anom
 
 # --------- Reporting ---------
-def add_specs_table(doc: Document, df_specs: pd.DataFrame):
-    doc.add_heading('Machine Specifications', level=1)
+def _specs_table(df_specs: pd.DataFrame) -> Tuple[List[str], List[List[str]]]:
+    # Header + stringified cells, shared by the DOCX and PDF renderers
     cols = ['machine_name', 'architecture', 'os', 'os_version', 'cpu_model', 'gpu_model', 'ram_gb', 'models_tested', 'started_at']
     df = df_specs[cols].rename(columns={
         'machine_name': 'Machine',
@@ -256,34 +368,41 @@ def add_specs_table(doc: Document, df_specs: pd.DataFrame):
         'models_tested': 'Models',
         'started_at': 'Started',
     })
-    table = doc.add_table(rows=1, cols=len(df.columns))
+    rows = [[str(round(v, 2) if isinstance(v, (float, int)) else v) for v in row]
+            for row in df.itertuples(index=False, name=None)]
+    return list(df.columns), rows
+
+def add_specs_table(doc: Document, df_specs: pd.DataFrame):
+    doc.add_heading('Machine Specifications', level=1)
+    header, rows = _specs_table(df_specs)
+    table = doc.add_table(rows=1, cols=len(header))
     table.style = 'Table Grid'
     table.alignment = WD_TABLE_ALIGNMENT.CENTER
-    for i, c in enumerate(df.columns):
+    for i, c in enumerate(header):
         hdr = table.rows[0].cells[i]
         hdr.text = c
         hdr.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-    for _, row in df.iterrows():
+    for row in rows:
         cells = table.add_row().cells
         for i, v in enumerate(row):
-            cells[i].text = str(round(v, 2) if isinstance(v, (float, int)) else v)
+            cells[i].text = v
             cells[i].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
     doc.add_paragraph()
 
-def savefig(doc: Document, fig, title: str, fname: str):
+def render_figure(fig, fname: str) -> Path:
+    # Runs on a pool thread; the figure must not be touched again until this finishes
     out = FIG_DIR / f'{fname}.png'
-    fig.savefig(out, dpi=300, bbox_inches='tight')
-    plt.close(fig)
-    doc.add_heading(title, level=2)
-    doc.add_picture(str(out), width=Inches(6))
+    fig.savefig(out, dpi=FIG_DPI, bbox_inches='tight', pil_kwargs={'compress_level': 1})
+    return out
 
-def add_performance_figures(doc: Document, df_perf: pd.DataFrame):
-    doc.add_heading('Performance Comparisons', level=1)
-    df_sum = df_perf[df_perf['is_digit'] == False].copy()
-    if df_sum.empty:
-        doc.add_paragraph('No summary rows parsed.')
-        return
+def attach_figure(doc: Document, title: str, fname: str):
+    doc.add_heading(title, level=2)
+    doc.add_picture(str(FIG_DIR / f'{fname}.png'), width=Inches(6))
 
+def iter_performance_figures(df_sum: pd.DataFrame, df_digit: pd.DataFrame) -> Iterator[Tuple[Any, str, str]]:
+    # Yields (figure, title, fname) one chart at a time; the caller renders and closes each figure.
+    # Every chart gets its own Figure: yielded figures are rendered later (thread pool / PdfPages),
+    # so a single reused, cleared Figure would be overwritten before it is drawn.
     # Average latency bars
     for fld, title, fname in [
         ('cpu_elapsed_avg_ms', 'Average CPU Inference Time per Model (ms)', 'avg_cpu_time'),
@@ -296,8 +415,7 @@ def add_performance_figures(doc: Document, df_perf: pd.DataFrame):
         ('speedup_gpu_over_cpu', 'GPU/CPU Speedup (×)', 'speedup'),
         ('gpu_samples_per_sec', 'GPU Throughput (samples/sec)', 'throughput_gpu'),
     ]:
-        sub = df_sum.copy()
-        sub = sub.replace([np.inf, -np.inf], np.nan)
+        sub = df_sum.replace([np.inf, -np.inf], np.nan)
         # Be explicit to avoid the FutureWarning about downcasting
         pd.set_option('future.no_silent_downcasting', True)
         sub = sub.dropna(subset=['machine_name', 'model_file', fld], how='any')
@@ -306,20 +424,21 @@ def add_performance_figures(doc: Document, df_perf: pd.DataFrame):
         fig, ax = plt.subplots(figsize=(10, 6))
         # Minimal matplotlib (no seaborn) for portability
         # Use a pivot_table to aggregate duplicates robustly and avoid reindex errors
-        piv = sub.pivot_table(index='machine_name', columns='model_file', values=fld, aggfunc='mean')
+        piv = sub.pivot_table(index='machine_name', columns='model_file', values=fld, aggfunc='mean', observed=True)
         # Freeze orderings for stable chart layout
-        machines = list(piv.index)
-        models = list(piv.columns)
-        width = 0.8 / max(1, len(models))
+        Y = piv.to_numpy(dtype=np.float64, na_value=np.nan)
+        machines = piv.index.to_numpy()
+        models = piv.columns.to_numpy()
         x = np.arange(len(machines))
+        width = 0.8 / max(1, len(models))
+        offsets = (np.arange(len(models)) - (len(models)-1)/2) * width
         for j, m in enumerate(models):
-            y = piv[m].astype(float).values
-            ax.bar(x + j*width, y, width=width, label=m)
-        ax.set_xticks(x + (len(models)-1)*width/2)
+            ax.bar(x + offsets[j], Y[:, j], width=width, label=m)
+        ax.set_xticks(x)
         ax.set_xticklabels(machines, rotation=30, ha='right')
         ax.set_title(title)
         ax.legend(fontsize=8, ncols=2)
-        savefig(doc, fig, title, fname)
+        yield fig, title, fname
 
     # Percentile latency scatter (CPU vs GPU)
     sub = df_sum.replace([np.inf, -np.inf], np.nan)
@@ -329,11 +448,12 @@ def add_performance_figures(doc: Document, df_perf: pd.DataFrame):
             fig, ax = plt.subplots(figsize=(7, 6))
             ax.scatter(gg['lat_p90_cpu_ms'], gg['lat_p90_gpu_ms'])
             # After (cleaner)
-            for _, r in gg.iterrows():
+            # Only annotate points in the top 5% of GPU P90 or CPU P90
+            q_cpu = gg['lat_p90_cpu_ms'].quantile(0.95)
+            q_gpu = gg['lat_p90_gpu_ms'].quantile(0.95)
+            for r in gg[['machine_id', 'model_size', 'lat_p90_cpu_ms', 'lat_p90_gpu_ms']].to_dict('records'):
                 label = f"{str(r['machine_id'])[:6]} ({r['model_size']})"
-                # Only annotate points in the top 5% of GPU P90 or CPU P90
-                if (r['lat_p90_cpu_ms'] > gg['lat_p90_cpu_ms'].quantile(0.95) or
-                    r['lat_p90_gpu_ms'] > gg['lat_p90_gpu_ms'].quantile(0.95)):
+                if r['lat_p90_cpu_ms'] > q_cpu or r['lat_p90_gpu_ms'] > q_gpu:
                     ax.annotate(label,
                                 (r['lat_p90_cpu_ms'], r['lat_p90_gpu_ms']),
                                 fontsize=7, alpha=0.7)
@@ -341,78 +461,104 @@ def add_performance_figures(doc: Document, df_perf: pd.DataFrame):
             ax.set_xlabel('CPU P90 (ms)')
             ax.set_ylabel('GPU P90 (ms)')
             ax.set_title('Latency P90: CPU vs GPU')
-            savefig(doc, fig, 'Latency P90: CPU vs GPU', 'p90_scatter')
+            yield fig, 'Latency P90: CPU vs GPU', 'p90_scatter'
 
-    # Per‑digit heatmaps (CPU time and drift)
-    df_digit = df_perf[df_perf['is_digit'] == True].copy()
+    # Per‑digit heatmaps (CPU time and drift) from one groupby, so both share row/column order
     if not df_digit.empty:
-        # CPU time heatmap
-        piv = df_digit.pivot_table(values='cpu_elapsed_ms', index='machine_name', columns='digit', aggfunc='mean')
-        if not piv.empty:
+        g = df_digit.groupby(['machine_name', 'digit'], observed=True).agg(
+            cpu_ms=('cpu_elapsed_ms', 'mean'), drift=('drift_max_abs', 'mean'))
+        for col, title, heading, fname in [
+            ('cpu_ms', 'CPU Elapsed Time (ms) per Digit', 'CPU Elapsed Time Heatmap per Digit', 'heat_cpu_digit'),
+            ('drift', 'Max Abs Drift per Digit', 'Max Abs Drift Heatmap per Digit', 'heat_drift_digit'),
+        ]:
+            piv = g[col].unstack('digit').dropna(how='all').dropna(axis=1, how='all')
+            if piv.empty:
+                continue
             fig, ax = plt.subplots(figsize=(12, 7))
             im = ax.imshow(piv.values, aspect='auto')
             ax.set_xticks(range(len(piv.columns)))
             ax.set_xticklabels(piv.columns)
             ax.set_yticks(range(len(piv.index)))
             ax.set_yticklabels(piv.index)
-            ax.set_title('CPU Elapsed Time (ms) per Digit')
+            ax.set_title(title)
             fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
-            savefig(doc, fig, 'CPU Elapsed Time Heatmap per Digit', 'heat_cpu_digit')
+            yield fig, heading, fname
 
-        # Drift heatmap
-        piv2 = df_digit.dropna(subset=['drift_max_abs']).pivot_table(values='drift_max_abs', index='machine_name', columns='digit', aggfunc='mean')
-        if not piv2.empty:
-            fig, ax = plt.subplots(figsize=(12, 7))
-            im = ax.imshow(piv2.values, aspect='auto')
-            ax.set_xticks(range(len(piv2.columns)))
-            ax.set_xticklabels(piv2.columns)
-            ax.set_yticks(range(len(piv2.index)))
-            ax.set_yticklabels(piv2.index)
-            ax.set_title('Max Abs Drift per Digit')
-            fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
-            savefig(doc, fig, 'Max Abs Drift Heatmap per Digit', 'heat_drift_digit')
+def add_performance_figures(doc: Document, df_sum: pd.DataFrame, df_digit: pd.DataFrame):
+    doc.add_heading('Performance Comparisons', level=1)
+    if df_sum.empty:
+        doc.add_paragraph('No summary rows parsed.')
+        return
+
+    # Each figure is rendered on a worker thread as soon as it is built; docx writes stay serial
+    futures = []
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            for fig, title, fname in iter_performance_figures(df_sum, df_digit):
+                futures.append((fig, title, fname, pool.submit(render_figure, fig, fname)))
+
+            # python-docx is not thread-safe: attach in submission order once each render is done
+            for fig, title, fname, fut in futures:
+                fut.result()
+                attach_figure(doc, title, fname)
+    finally:
+        # The pool has drained by now, so no figure is still being rendered
+        for fig, *_ in futures:
+            plt.close(fig)
+
+def _summary_table(df_sum: pd.DataFrame) -> Tuple[List[str], List[List[str]]]:
+    # Header + formatted cells, shared by the DOCX and PDF renderers
+    text_cols = ['machine_name', 'model_file', 'model_size']
+    num_fmts = {
+        'cpu_top1_accuracy': '{:.3f}',
+        'gpu_top1_accuracy': '{:.3f}',
+        'avg_drift_mae': '{:.6f}',
+        'webgpu_init_time_ms': '{:.1f}',
+        'speedup_gpu_over_cpu': '{:.2f}',
+    }
+    sub = df_sum[text_cols + list(num_fmts)].replace([np.inf, -np.inf], np.nan)
+
+    # Format whole columns once; missing values become '–'
+    cells = sub[text_cols].astype(str)
+    for col, spec in num_fmts.items():
+        cells[col] = sub[col].map(spec.format).where(sub[col].notna(), '–')
+    rows = [list(r) for r in cells.itertuples(index=False, name=None)]
+    return ['Machine','Model','Size','CPU Acc','GPU Acc','Drift MAE','Init (ms)','Speedup×'], rows
 
 def add_summary_table(doc: Document, df_sum: pd.DataFrame, df_anom: pd.DataFrame):
     doc.add_heading('Summary Performance Table', level=2)
-    cols = [
-        'machine_name','model_file','model_size','cpu_top1_accuracy','gpu_top1_accuracy',
-        'avg_drift_mae','webgpu_init_time_ms','speedup_gpu_over_cpu'
-    ]
-    sub = df_sum[cols].copy()
-    sub = sub.replace([np.inf, -np.inf], np.nan)
-
-    table = doc.add_table(rows=1, cols=len(cols))
+    header, rows = _summary_table(df_sum)
+    table = doc.add_table(rows=1, cols=len(header))
     table.style = 'Table Grid'
-    for i, h in enumerate(['Machine','Model','Size','CPU Acc','GPU Acc','Drift MAE','Init (ms)','Speedup×']):
+    for i, h in enumerate(header):
         cell = table.rows[0].cells[i]
         cell.text = h
 
-    for _, r in sub.iterrows():
+    for row in rows:
         cells = table.add_row().cells
-        vals = [
-            r['machine_name'], r['model_file'], r['model_size'],
-            f"{r['cpu_top1_accuracy']:.3f}" if pd.notna(r['cpu_top1_accuracy']) else '–',
-            f"{r['gpu_top1_accuracy']:.3f}" if pd.notna(r['gpu_top1_accuracy']) else '–',
-            f"{r['avg_drift_mae']:.6f}" if pd.notna(r['avg_drift_mae']) else '–',
-            f"{r['webgpu_init_time_ms']:.1f}" if pd.notna(r['webgpu_init_time_ms']) else '–',
-            f"{r['speedup_gpu_over_cpu']:.2f}" if pd.notna(r['speedup_gpu_over_cpu']) else '–',
-        ]
-        for i, v in enumerate(vals):
-            cells[i].text = str(v)
+        for i, v in enumerate(row):
+            cells[i].text = v
 
     if not df_anom.empty:
         doc.add_paragraph()
         doc.add_paragraph("⚠ Anomalies detected:")
-        for _, row in df_anom.iterrows():
-            doc.add_paragraph(f"• {row['machine_name']} / {row['model_file']}: {row['anomaly']}", style=None)
+        for mach, mod, anomaly in df_anom[['machine_name', 'model_file', 'anomaly']].itertuples(index=False, name=None):
+            doc.add_paragraph(f"• {mach} / {mod}: {anomaly}", style=None)
+
+def _write_csv(df: pd.DataFrame, out: Path):
+    # pyarrow output quotes every string cell/header and writes booleans as true/false
+    if pa is not None:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pacsv.write_csv(table, out, write_options=pacsv.WriteOptions(quoting_style='needed'))
+    else:
+        df.to_csv(out, index=False)
 
-def write_sidecar_csvs(df_specs: pd.DataFrame, df_perf: pd.DataFrame):
+def write_sidecar_csvs(df_specs: pd.DataFrame, df_summary: pd.DataFrame, df_digits: pd.DataFrame):
     (REPORT_FOLDER).mkdir(parents=True, exist_ok=True)
-    FIG_DIR.mkdir(parents=True, exist_ok=True)
-    df_specs.to_csv(REPORT_FOLDER / 'specs.csv', index=False)
-    df_perf.to_csv(REPORT_FOLDER / 'all_rows.csv', index=False)
-    df_perf[df_perf['is_digit']==False].to_csv(REPORT_FOLDER / 'summary.csv', index=False)
-    df_perf[df_perf['is_digit']==True].to_csv(REPORT_FOLDER / 'digits.csv', index=False)
+    _write_csv(df_specs, REPORT_FOLDER / 'specs.csv')
+    _write_csv(pd.concat([df_summary, df_digits], ignore_index=True), REPORT_FOLDER / 'all_rows.csv')
+    _write_csv(df_summary, REPORT_FOLDER / 'summary.csv')
+    _write_csv(df_digits, REPORT_FOLDER / 'digits.csv')
 
 def maybe_export_pdf(docx_path: Path):
     # Try LibreOffice headless; if not found, skip gracefully.
@@ -427,25 +573,78 @@ def maybe_export_pdf(docx_path: Path):
     except Exception as e:
         print(f"PDF export failed: {e}")
 
+def _pdf_table_pages(pdf: PdfPages, title: str, header: List[str], rows: List[List[str]], rows_per_page: int = 30):
+    # Landscape A4 pages with a plain matplotlib table, split every rows_per_page rows
+    for start in range(0, max(1, len(rows)), rows_per_page):
+        chunk = rows[start:start + rows_per_page]
+        fig, ax = plt.subplots(figsize=(11.69, 8.27))
+        ax.axis('off')
+        ax.set_title(title if start == 0 else f'{title} (cont.)', loc='left')
+        if chunk:
+            tbl = ax.table(cellText=chunk, colLabels=header, loc='upper center', cellLoc='center')
+            tbl.auto_set_font_size(False)
+            tbl.set_fontsize(7)
+            tbl.auto_set_column_width(list(range(len(header))))
+        pdf.savefig(fig)
+        plt.close(fig)
+
+def write_pdf_report(pdf_out: Path, intro: List[str], df_specs: pd.DataFrame, df_summary: pd.DataFrame,
+                     df_digits: pd.DataFrame, df_anom: pd.DataFrame):
+    # Direct PDF: same sections as the DOCX, without the LibreOffice round-trip
+    with PdfPages(pdf_out) as pdf:
+        fig = plt.figure(figsize=(11.69, 8.27))
+        fig.text(0.05, 0.85, REPORT_TITLE, fontsize=16, weight='bold')
+        for i, line in enumerate(intro):
+            fig.text(0.05, 0.78 - i*0.04, line, fontsize=11)
+        pdf.savefig(fig)
+        plt.close(fig)
+
+        _pdf_table_pages(pdf, 'Machine Specifications', *_specs_table(df_specs))
+        if not df_summary.empty:
+            for fig, title, fname in iter_performance_figures(df_summary, df_digits):
+                pdf.savefig(fig, bbox_inches='tight')
+                plt.close(fig)
+        _pdf_table_pages(pdf, 'Summary Performance Table', *_summary_table(df_summary))
+        if not df_anom.empty:
+            rows = [list(map(str, r)) for r in df_anom[['machine_name', 'model_file', 'anomaly']].itertuples(index=False, name=None)]
+            _pdf_table_pages(pdf, '⚠ Anomalies detected', ['Machine', 'Model', 'Anomaly'], rows)
+
 def main():
+    parser = argparse.ArgumentParser(description='Build a report from telemetry_*.json files.')
+    parser.add_argument('dirs', nargs='*', help='input folders (default: public/reports and public/reports_local)')
+    parser.add_argument('--format', choices=['docx', 'pdf'], default='docx',
+                        help='docx (plus PDF via LibreOffice if installed) or pdf rendered directly')
+    args = parser.parse_args()
+
     MANUAL_REPORTS_DIR.mkdir(exist_ok=True)
     REPORT_FOLDER.mkdir(parents=True, exist_ok=True)
-    FIG_DIR.mkdir(parents=True, exist_ok=True)
 
-    df_specs, df_perf, json_files, df_anom = load_all()
-    write_sidecar_csvs(df_specs, df_perf)
+    df_specs, df_summary, df_digits, json_files, df_anom = load_all(args.dirs)
+    write_sidecar_csvs(df_specs, df_summary, df_digits)
+
+    intro = [
+        f'Generated on {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}',
+        f'Analyzed {len(json_files)} telemetry files from {df_specs["machine_id"].nunique()} machine(s).',
+        f'Total model evaluations (summary rows): {len(df_summary)}',
+    ]
 
-    # Build the document
+    if args.format == 'pdf':
+        pdf_out = REPORT_FOLDER / 'telemetry_report.pdf'
+        write_pdf_report(pdf_out, intro, df_specs, df_summary, df_digits, df_anom)
+        print(f"PDF generated: {pdf_out}")
+        return
+
+    # Build the document (figure PNGs are only needed for the DOCX)
+    FIG_DIR.mkdir(parents=True, exist_ok=True)
     doc = Document()
-    doc.add_heading('Distributed ML Infrastructure Testing Framework — Telemetry Report', 0)
-    doc.add_paragraph(f'Generated on {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
-    doc.add_paragraph(f'Analyzed {len(json_files)} telemetry files from {df_specs["machine_id"].nunique()} machine(s).')
-    doc.add_paragraph(f'Total model evaluations (summary rows): {len(df_perf[df_perf["is_digit"]==False])}')
+    doc.add_heading(REPORT_TITLE, 0)
+    for line in intro:
+        doc.add_paragraph(line)
     doc.add_paragraph()
 
     add_specs_table(doc, df_specs)
-    add_performance_figures(doc, df_perf)
-    add_summary_table(doc, df_perf[df_perf["is_digit"]==False].copy(), df_anom)
+    add_performance_figures(doc, df_summary, df_digits)
+    add_summary_table(doc, df_summary, df_anom)
 
     docx_out = REPORT_FOLDER / 'telemetry_report.docx'
     doc.save(docx_out)